@@ -10,12 +10,21 @@ For a 13x9 grid, center tiles are:
 - Row 4, Col 6: tile 59 → new tile 2
 - Row 5, Col 6: tile 72 → new tile 4 (snake pattern)
 - Row 5, Col 5: tile 73 → new tile 3 (snake pattern)
+
+Pass --link to hard-link tiles instead of copying them when source and
+destination share a filesystem. The test set then mirrors the source data,
+so it must be treated as read-only.
 """
 
+import argparse
+import errno
+import os
 import shutil
 import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from tqdm import tqdm
 
 # Configuration
 SOURCE_PROJECT = Path("/blue/maigan/smith6jt/KINTSUGI_Projects/CODEX_SP_LN/1904CC1-1L")
@@ -33,59 +42,197 @@ TILE_MAPPING = {
     72: 4,  # Row 5, Col 6 → position (1,1) - snake reverses
 }
 
-def rename_tile(filename: str, old_tile: int, new_tile: int) -> str:
-    """Rename tile number in filename."""
-    # Pattern: 1_XXXXX_Z0ZZ_CHC.tif where XXXXX is 5-digit tile number
-    old_str = f"1_{old_tile:05d}_"
-    new_str = f"1_{new_tile:05d}_"
-    return filename.replace(old_str, new_str)
-
+# Filename prefixes for TILE_MAPPING, e.g. "1_00058_" -> "1_00001_"
+# Pattern: 1_XXXXX_Z0ZZ_CHC.tif where XXXXX is 5-digit tile number
+TILE_PREFIXES = {
+    f"1_{old_tile:05d}_": f"1_{new_tile:05d}_"
+    for old_tile, new_tile in TILE_MAPPING.items()
+}
 
-def copy_cycle(cycle_name: str):
-    """Copy tiles for a single cycle."""
+# Per-thread reusable buffer for the read/write fallback in _fastcopy
+_COPY_LOCAL = threading.local()
+
+# Errors that mean the kernel copy syscall is unsupported for this fd pair
+# (ENOTSOCK: macOS sendfile only writes to sockets)
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSOCK}
+
+# Errors that mean a hard link is not possible and the file must be copied
+# (EEXIST: a stale destination from an earlier run is overwritten in place)
+_LINK_FALLBACK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EOPNOTSUPP, errno.EEXIST}
+
+
+def _fastcopy(src: str | Path, dst: str | Path, link: bool = False):
+    """Copy a file using in-kernel copies where available, then copy stat info.
+
+    With link=True, tries a hard link first. Otherwise tries copy_file_range
+    (reflink/server-side copy on btrfs, xfs, NFS), then sendfile, then a
+    buffered read/write loop.
+    """
+    if link:
+        try:
+            os.link(src, dst)
+            return
+        except OSError as e:
+            if e.errno not in _LINK_FALLBACK_ERRNOS:
+                raise
+
+    in_fd = os.open(src, os.O_RDONLY)
+    try:
+        out_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            remaining = os.fstat(in_fd).st_size
+            remaining = _copy_range(in_fd, out_fd, remaining)
+            if remaining:
+                remaining = _copy_sendfile(in_fd, out_fd, remaining)
+            if remaining:
+                _copy_buffered(in_fd, out_fd)
+        finally:
+            os.close(out_fd)
+    finally:
+        os.close(in_fd)
+
+    shutil.copystat(src, dst, follow_symlinks=False)
+
+
+def _copy_range(in_fd: int, out_fd: int, remaining: int) -> int:
+    """Copy with os.copy_file_range. Returns bytes left uncopied."""
+    if not hasattr(os, "copy_file_range"):
+        return remaining
+    try:
+        while remaining > 0:
+            n = os.copy_file_range(in_fd, out_fd, remaining)
+            if n == 0:
+                break
+            remaining -= n
+    except OSError as e:
+        if e.errno not in _FALLBACK_ERRNOS:
+            raise
+    return remaining
+
+
+def _copy_sendfile(in_fd: int, out_fd: int, remaining: int) -> int:
+    """Copy with os.sendfile. Returns bytes left uncopied."""
+    if not hasattr(os, "sendfile"):
+        return remaining
+    try:
+        while remaining > 0:
+            n = os.sendfile(out_fd, in_fd, None, remaining)
+            if n == 0:
+                break
+            remaining -= n
+    except OSError as e:
+        if e.errno not in _FALLBACK_ERRNOS:
+            raise
+    return remaining
+
+
+def _copy_buffered(in_fd: int, out_fd: int):
+    """Copy the rest of in_fd with a read/write loop over a 1 MiB buffer."""
+    buffer = getattr(_COPY_LOCAL, "buffer", None)
+    if buffer is None:
+        buffer = _COPY_LOCAL.buffer = bytearray(1 << 20)
+    view = memoryview(buffer)
+    with open(in_fd, "rb", buffering=0, closefd=False) as f:
+        while True:
+            n = f.readinto(view)
+            if not n:
+                break
+            written = 0
+            while written < n:
+                written += os.write(out_fd, view[written:n])
+
+
+def plan_cycle(cycle_name: str) -> list[tuple[str, str]] | None:
+    """List (source, destination) pairs still to be copied for a single cycle.
+
+    Returns None when the source cycle does not exist.
+    """
     source_dir = SOURCE_PROJECT / "data" / "raw" / cycle_name
     dest_dir = DEST_PROJECT / "data" / "raw" / cycle_name
 
     if not source_dir.exists():
         print(f"Warning: Source cycle not found: {source_dir}")
-        return 0
+        return None
 
-    dest_dir.mkdir(parents=True, exist_ok=True)
+    # Plain string paths in the loop; DirEntry.path already joins the source side
+    dst_prefix = os.fspath(dest_dir) + os.sep
 
-    copied = 0
-    for old_tile, new_tile in TILE_MAPPING.items():
-        # Find all files for this tile (all z-planes and channels)
-        pattern = f"1_{old_tile:05d}_*.tif"
-        tile_files = list(source_dir.glob(pattern))
+    # Single directory pass for all tiles (all z-planes and channels)
+    copies = []
+    with os.scandir(source_dir) as it:
+        for entry in it:
+            new_prefix = TILE_PREFIXES.get(entry.name[:8])
+            if new_prefix is None or not entry.name.endswith(".tif"):
+                continue
 
-        for src_file in tile_files:
-            new_name = rename_tile(src_file.name, old_tile, new_tile)
-            dest_file = dest_dir / new_name
+            dest_file = dst_prefix + new_prefix + entry.name[8:]
 
-            if not dest_file.exists():
-                shutil.copy2(src_file, dest_file)
-                copied += 1
+            # Skip files already copied by a previous run
+            try:
+                dst_st = os.stat(dest_file)
+                src_st = entry.stat()
+                if dst_st.st_size == src_st.st_size and dst_st.st_mtime_ns >= src_st.st_mtime_ns:
+                    continue
+            except FileNotFoundError:
+                pass
 
-    return copied
+            copies.append((entry.path, dest_file))
+
+    return copies
+
+
+def copy_files(copies: list[tuple[str, str]], link: bool = False) -> int:
+    """Copy (source, destination) pairs concurrently. Returns files copied."""
+    if not copies:
+        return 0
+
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_fastcopy, src, dst, link) for src, dst in copies]
+        completed = as_completed(futures)
+
+        # Only show a progress bar on an interactive terminal (not in CI logs)
+        if sys.stderr.isatty():
+            from tqdm import tqdm
+            completed = tqdm(completed, total=len(futures), desc="Copying files")
+
+        for future in completed:
+            future.result()
+
+    return len(futures)
 
 
 def copy_metadata():
-    """Copy metadata files if they exist."""
+    """Symlink metadata files if they exist, copying where symlinks are unavailable."""
     source_meta = SOURCE_PROJECT / "meta"
     dest_meta = DEST_PROJECT / "meta"
 
-    dest_meta.mkdir(parents=True, exist_ok=True)
-
-    # Copy channel names file if exists
+    # Link channel names file if exists (stays in sync with the source)
     for fname in ["CHANNELNAMES.txt", "channelnames.txt", "channel_names.txt"]:
         src = source_meta / fname
         if src.exists():
-            shutil.copy2(src, dest_meta / fname)
-            print(f"Copied: {fname}")
+            dest = dest_meta / fname
+            try:
+                os.symlink(src.resolve(), dest)
+                print(f"Linked: {fname}")
+            except FileExistsError:
+                print(f"Exists: {fname}")
+            except OSError:
+                # e.g. Windows without symlink privilege
+                shutil.copy2(src, dest)
+                print(f"Copied: {fname}")
             break
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Setup KINTSUGI mini test project")
+    parser.add_argument(
+        "--link",
+        action="store_true",
+        help="Hard-link tiles instead of copying when on the same filesystem",
+    )
+    args = parser.parse_args()
+
     print("=" * 60)
     print("KINTSUGI Test Data Setup")
     print("=" * 60)
@@ -95,15 +242,25 @@ def main():
     print(f"Tiles: {list(TILE_MAPPING.keys())} → {list(TILE_MAPPING.values())}")
     print("=" * 60)
 
-    # Create destination structure
-    DEST_PROJECT.mkdir(parents=True, exist_ok=True)
-
-    # Copy cycles
-    total_copied = 0
-    for cycle in tqdm(CYCLES, desc="Copying cycles"):
-        copied = copy_cycle(cycle)
-        total_copied += copied
-        print(f"  {cycle}: {copied} files")
+    # Collect files from every cycle, then copy them in parallel
+    copies = []
+    cycle_counts = []
+    for cycle in CYCLES:
+        cycle_copies = plan_cycle(cycle)
+        if cycle_copies is None:
+            cycle_counts.append((cycle, 0))
+            continue
+
+        # Create destination directories up front, before any copies run
+        os.makedirs(DEST_PROJECT / "data" / "raw" / cycle, exist_ok=True)
+        copies.extend(cycle_copies)
+        cycle_counts.append((cycle, len(cycle_copies)))
+    os.makedirs(DEST_PROJECT / "meta", exist_ok=True)
+
+    total_copied = copy_files(copies, link=args.link)
+
+    # Report per-cycle counts once the pool has finished
+    sys.stdout.write("".join(f"  {cycle}: {count} files\n" for cycle, count in cycle_counts))
 
     # Copy metadata
     print("\nCopying metadata...")
@@ -0,0 +1,146 @@
+"""
+Shared plugin discovery for validate_plugins.py and generate_marketplace.py.
+
+Walks plugins/<category>/<plugin>/, reads every .claude-plugin/plugin.json
+concurrently and parses it once. Parsed metadata is cached in
+.cache/plugin_meta.json, keyed by each plugin.json's mtime and size, so
+repeated runs only stat unchanged files.
+"""
+
+import json
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Bump when the meaning of cached entries changes
+CACHE_VERSION = 4
+
+
+def _read_bytes(path: str) -> bytes | OSError:
+    """Read a file, returning the error instead of raising it."""
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError as e:
+        return e
+
+
+def _loads(data: bytes):
+    """Decode UTF-8 JSON bytes.
+
+    Always uses the stdlib parser on decoded text, so results do not depend
+    on optional packages. As with json.load on a UTF-8 file, a BOM is
+    rejected and NaN/Infinity are accepted.
+    """
+    return json.loads(data.decode("utf-8"))
+
+
+def _load_cache(cache_path: Path) -> dict:
+    """Load the metadata cache, treating any unreadable cache as empty."""
+    try:
+        cache = _loads(cache_path.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    plugins = cache.get("plugins")
+    return plugins if isinstance(plugins, dict) else {}
+
+
+def _save_cache(cache_path: Path, cache: dict):
+    """Write the metadata cache, ignoring failures (e.g. read-only checkout)."""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(
+            json.dumps({"version": CACHE_VERSION, "plugins": cache}), encoding="utf-8"
+        )
+    except OSError:
+        pass
+
+
+def iter_plugins(
+    plugins_dir: Path, cache_path: Path | None = None, skip_missing: bool = False
+):
+    """Yield (plugin_dir, plugin_data, error) for every plugin in the registry.
+
+    A plugin is any plugins/<category>/<plugin>/ directory containing a
+    .claude-plugin directory. plugin_data is the parsed plugin.json, or None
+    when it is missing or unreadable, in which case error describes why.
+    With skip_missing=True, plugins without a plugin.json are not yielded.
+    """
+    if not plugins_dir.is_dir():
+        return
+
+    if cache_path is None:
+        cache_path = plugins_dir.parent / ".cache" / "plugin_meta.json"
+    cache = _load_cache(cache_path)
+    base = str(plugins_dir.parent) + os.sep
+
+    # Walk the tree, using cached metadata where plugin.json is unchanged
+    fresh_cache = {}
+    plugins = []
+    to_read = []
+    with os.scandir(plugins_dir) as categories:
+        for category_entry in categories:
+            if not category_entry.is_dir():
+                continue
+
+            with os.scandir(category_entry.path) as plugin_entries:
+                for plugin_entry in plugin_entries:
+                    if not plugin_entry.is_dir():
+                        continue
+
+                    claude_plugin_dir = os.path.join(plugin_entry.path, ".claude-plugin")
+                    if not os.path.isdir(claude_plugin_dir):
+                        continue
+
+                    plugin_json = os.path.join(claude_plugin_dir, "plugin.json")
+                    key = plugin_json.removeprefix(base)
+                    try:
+                        st = os.stat(plugin_json)
+                    except OSError:
+                        st = None
+                    if st is None or not stat.S_ISREG(st.st_mode):
+                        if skip_missing:
+                            continue
+                        plugins.append(
+                            [plugin_entry.path, None, f"Missing plugin.json in {claude_plugin_dir}"]
+                        )
+                        continue
+
+                    cached = cache.get(key)
+                    if (
+                        isinstance(cached, dict)
+                        and cached.get("mtime_ns") == st.st_mtime_ns
+                        and cached.get("size") == st.st_size
+                    ):
+                        fresh_cache[key] = cached
+                        plugins.append([plugin_entry.path, cached["data"], None])
+                        continue
+
+                    record = [plugin_entry.path, None, None]
+                    plugins.append(record)
+                    to_read.append((record, plugin_json, key, st))
+
+    # Read changed plugin.json files concurrently, decode on this thread
+    if to_read:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            contents = list(executor.map(_read_bytes, [item[1] for item in to_read]))
+
+        for (record, plugin_json, key, st), raw in zip(to_read, contents):
+            if isinstance(raw, OSError):
+                record[2] = f"Could not read {plugin_json}: {raw}"
+                continue
+            try:
+                record[1] = _loads(raw)
+            except ValueError as e:
+                record[2] = f"Invalid JSON in {plugin_json}: {e}"
+                continue
+            fresh_cache[key] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "data": record[1]}
+
+    if fresh_cache != cache:
+        _save_cache(cache_path, fresh_cache)
+
+    for plugin_path, plugin_data, error in plugins:
+        yield Path(plugin_path), plugin_data, error
@@ -3,46 +3,46 @@
 Generate marketplace.json from all plugins in the registry.
 """
 
+import gzip
 import json
-from datetime import datetime
+import os
+import time
 from pathlib import Path
 
+from _plugin_walk import iter_plugins
 
-def collect_plugins(plugins_dir: Path) -> list[dict]:
-    """Collect metadata from all plugins."""
-    plugins = []
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-    if not plugins_dir.is_dir():
-        return plugins
 
-    for category_dir in plugins_dir.iterdir():
-        if not category_dir.is_dir():
-            continue
+def _drop_empty(entry: dict) -> dict:
+    """Remove fields that are None, empty strings or empty dicts."""
+    return {k: v for k, v in entry.items() if v is not None and v != "" and v != {}}
 
-        category_name = category_dir.name
 
-        for plugin_dir in category_dir.iterdir():
-            if not plugin_dir.is_dir():
-                continue
+def collect_plugins(plugins_dir: Path) -> list[dict]:
+    """Collect metadata from all plugins."""
+    plugins = []
 
-            plugin_json_path = plugin_dir / ".claude-plugin" / "plugin.json"
-            if not plugin_json_path.is_file():
-                continue
+    # Plugin paths are reported relative to the registry root
+    base = str(plugins_dir.parent) + os.sep
 
-            try:
-                with open(plugin_json_path, "r", encoding="utf-8") as f:
-                    plugin_data = json.load(f)
+    # Plugins without a plugin.json are skipped silently
+    for plugin_dir, plugin_data, error in iter_plugins(plugins_dir, skip_missing=True):
+        if error:
+            print(f"Warning: {error}")
+            continue
 
-                plugins.append({
-                    "name": plugin_data.get("name"),
-                    "version": plugin_data.get("version", "1.0.0"),
-                    "description": plugin_data.get("description", ""),
-                    "author": plugin_data.get("author", {}),
-                    "category": category_name,
-                    "path": str(plugin_dir.relative_to(plugins_dir.parent)),
-                })
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"Warning: Could not read {plugin_json_path}: {e}")
+        plugins.append({
+            "name": plugin_data.get("name"),
+            "version": plugin_data.get("version", "1.0.0"),
+            "description": plugin_data.get("description", ""),
+            "author": plugin_data.get("author", {}),
+            "category": plugin_dir.parent.name,
+            "path": str(plugin_dir).removeprefix(base),
+        })
 
     return plugins
 
@@ -57,13 +57,21 @@ def main():
 
     marketplace = {
         "version": "1.0.0",
-        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
         "repository": "https://github.com/smith-cop/Skills_Registry",
-        "plugins": plugins,
+        "plugins": [_drop_empty(plugin) for plugin in plugins],
     }
 
-    with open(marketplace_path, "w", encoding="utf-8") as f:
-        json.dump(marketplace, f, indent=2)
+    # Compact output, plus a pre-compressed copy for clients fetching over HTTP
+    if orjson is not None:
+        data = orjson.dumps(marketplace, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        # Match orjson byte-for-byte: compact separators, raw (unescaped) UTF-8
+        data = json.dumps(marketplace, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    marketplace_path.write_bytes(data)
+
+    with gzip.open(marketplace_path.with_suffix(".json.gz"), "wb", compresslevel=6) as gz:
+        gz.write(data)
 
     print(f"Generated marketplace.json with {len(plugins)} plugins")
 
@@ -3,34 +3,39 @@
 Validate plugin structure and required fields in the Skills Registry.
 """
 
-import json
+import os
 import sys
 from pathlib import Path
 
+from _plugin_walk import iter_plugins
 
-def validate_plugin(plugin_dir: Path) -> list[str]:
-    """Validate a single plugin directory. Returns list of errors."""
-    errors = []
 
-    # Check for .claude-plugin directory
-    claude_plugin_dir = plugin_dir / ".claude-plugin"
-    if not claude_plugin_dir.is_dir():
-        errors.append(f"Missing .claude-plugin directory in {plugin_dir}")
-        return errors
+def _iter_skill_md(skills_dir: Path):
+    """Yield SKILL.md paths under skills_dir, lazily walking the tree."""
+    for dirpath, _dirnames, filenames in os.walk(skills_dir):
+        if "SKILL.md" in filenames:
+            yield Path(dirpath) / "SKILL.md"
 
-    # Check for plugin.json
-    plugin_json_path = claude_plugin_dir / "plugin.json"
-    if not plugin_json_path.is_file():
-        errors.append(f"Missing plugin.json in {claude_plugin_dir}")
-        return errors
 
-    # Validate plugin.json content
-    try:
-        with open(plugin_json_path, "r", encoding="utf-8") as f:
-            plugin_data = json.load(f)
-    except json.JSONDecodeError as e:
-        errors.append(f"Invalid JSON in {plugin_json_path}: {e}")
-        return errors
+def _skill_entry_path(plugin_dir: Path, entry) -> str | None:
+    """Resolve one entry of a list-valued "skills" field to a relative path.
+
+    Entries are either {"path": "skills/<name>"} objects or plain strings,
+    which may be a path from the plugin directory or a name under skills/.
+    """
+    if isinstance(entry, dict):
+        entry = entry.get("path")
+    if not isinstance(entry, str) or not entry:
+        return None
+    if (plugin_dir / entry.lstrip("./")).is_dir():
+        return entry
+    return f"skills/{entry}"
+
+
+def validate_plugin(plugin_dir: Path, plugin_data: dict) -> list[str]:
+    """Validate a single plugin's parsed plugin.json. Returns list of errors."""
+    errors = []
+    plugin_json_path = plugin_dir / ".claude-plugin" / "plugin.json"
 
     # Check required fields
     required_fields = ["name", "description", "skills"]
@@ -38,16 +43,32 @@ def validate_plugin(plugin_dir: Path) -> list[str]:
         if field not in plugin_data:
             errors.append(f"Missing required field '{field}' in {plugin_json_path}")
 
-    # Check that skills directory exists
-    skills_path = plugin_data.get("skills", "./skills")
-    skills_dir = plugin_dir / skills_path.lstrip("./")
-    if not skills_dir.is_dir():
-        errors.append(f"Skills directory not found: {skills_dir}")
+    # "skills" is either a directory path or a list of skill entries
+    skills = plugin_data.get("skills", "./skills")
+    if isinstance(skills, str):
+        skills_paths = [skills]
+    elif isinstance(skills, list):
+        skills_paths = [_skill_entry_path(plugin_dir, entry) for entry in skills]
+        if not skills_paths:
+            errors.append(f"Empty 'skills' list in {plugin_json_path}")
     else:
-        # Check for at least one SKILL.md file
-        skill_files = list(skills_dir.rglob("SKILL.md"))
-        if not skill_files:
-            errors.append(f"No SKILL.md files found in {skills_dir}")
+        errors.append(f"Field 'skills' must be a string or list in {plugin_json_path}")
+        skills_paths = []
+
+    for skills_path in skills_paths:
+        if skills_path is None:
+            errors.append(f"Invalid 'skills' entry in {plugin_json_path}")
+            continue
+
+        # Check that skills directory exists
+        skills_dir = plugin_dir / skills_path.lstrip("./")
+        if not skills_dir.is_dir():
+            errors.append(f"Skills directory not found: {skills_dir}")
+        else:
+            # Check for at least one SKILL.md file
+            has_skill = any(True for _ in _iter_skill_md(skills_dir))
+            if not has_skill:
+                errors.append(f"No SKILL.md files found in {skills_dir}")
 
     return errors
 
@@ -62,36 +83,33 @@ def main():
 
     all_errors = []
     plugins_found = 0
+    lines = []
 
-    # Find all plugin directories (any directory containing .claude-plugin)
-    for category_dir in plugins_dir.iterdir():
-        if not category_dir.is_dir():
-            continue
-
-        for plugin_dir in category_dir.iterdir():
-            if not plugin_dir.is_dir():
-                continue
-
-            if (plugin_dir / ".claude-plugin").is_dir():
-                plugins_found += 1
-                errors = validate_plugin(plugin_dir)
-
-                if errors:
-                    all_errors.extend(errors)
-                    print(f"FAIL {plugin_dir.name}")
-                    for error in errors:
-                        print(f"  - {error}")
-                else:
-                    print(f"OK {plugin_dir.name}")
-
-    print(f"\nValidated {plugins_found} plugins")
-
-    if all_errors:
-        print(f"\n{len(all_errors)} error(s) found")
-        sys.exit(1)
-    else:
-        print("All plugins valid!")
-        sys.exit(0)
+    # Buffer the report into one write, flushing what we have even on errors
+    try:
+        # Find all plugin directories (any directory containing .claude-plugin)
+        for plugin_dir, plugin_data, read_error in iter_plugins(plugins_dir):
+            plugins_found += 1
+            errors = [read_error] if read_error else validate_plugin(plugin_dir, plugin_data)
+
+            if errors:
+                all_errors.extend(errors)
+                lines.append(f"FAIL {plugin_dir.name}\n")
+                lines.extend(f"  - {error}\n" for error in errors)
+            else:
+                lines.append(f"OK {plugin_dir.name}\n")
+
+        lines.append(f"\nValidated {plugins_found} plugins\n")
+
+        if all_errors:
+            lines.append(f"\n{len(all_errors)} error(s) found\n")
+        else:
+            lines.append("All plugins valid!\n")
+    finally:
+        sys.stdout.write("".join(lines))
+        sys.stdout.flush()
+
+    sys.exit(1 if all_errors else 0)
 
 
 if __name__ == "__main__":